@@ -3,6 +3,14 @@ from typing import List, Dict
 
 logger = logging.getLogger(__name__)
 
+# Integer code for each confidence level; missing or unexpected levels share OTHER_CODE
+CONFIDENCE_CODES = {"high": 0, "medium": 1, "low": 2, "unknown": 3}
+HIGH_CODE = CONFIDENCE_CODES["high"]
+MEDIUM_CODE = CONFIDENCE_CODES["medium"]
+LOW_CODE = CONFIDENCE_CODES["low"]
+UNKNOWN_CODE = CONFIDENCE_CODES["unknown"]
+OTHER_CODE = 4
+
 class ConfidenceScorer:
     """Calculate overall confidence scores for responses"""
     
@@ -11,6 +19,9 @@ class ConfidenceScorer:
         self.HIGH_CONFIDENCE_THRESHOLD = 0.8
         self.MEDIUM_CONFIDENCE_THRESHOLD = 0.5
         
+        # Points awarded per fact, indexed by confidence code
+        self.CONFIDENCE_WEIGHTS = (1.0, 0.6, 0.2, 0.0, 0.0)
+        
     def score_response(self, verified_facts: List[Dict]) -> Dict:
         """
         Calculate overall confidence score for a response
@@ -31,11 +42,9 @@ class ConfidenceScorer:
                 }
             }
         
-        # Count verification results
-        stats = self._calculate_stats(verified_facts)
-        
-        # Calculate confidence score (0.0 to 1.0)
-        confidence_score = self._calculate_confidence_score(stats, verified_facts)
+        # Count verification results, calculate confidence score (0.0 to 1.0)
+        # and categorize facts by verification status
+        stats, confidence_score, detailed_facts = self._scan(verified_facts)
         
         # Determine overall confidence level
         confidence_level, color, emoji = self._determine_confidence_level(confidence_score, stats)
@@ -50,22 +59,53 @@ class ConfidenceScorer:
             "emoji": emoji,
             "summary": summary,
             "stats": stats,
-            "detailed_facts": self._categorize_facts(verified_facts)
+            "detailed_facts": detailed_facts
         }
     
-    def _calculate_stats(self, verified_facts: List[Dict]) -> Dict:
-        """Calculate statistics from verified facts"""
+    def _scan(self, verified_facts: List[Dict]) -> tuple:
+        """
+        Calculate statistics and weighted confidence score in a single pass
+        High confidence facts = 1.0 points
+        Medium confidence facts = 0.6 points
+        Low confidence facts = 0.2 points
+        Unknown = 0.0 points
+        Returns: (stats, score, facts by verification status)
+        """
         total = len(verified_facts)
-        verified = sum(1 for f in verified_facts if f.get('verified') == True)
-        unverified = sum(1 for f in verified_facts if f.get('verified') == False and f.get('confidence') != 'unknown')
-        unknown = sum(1 for f in verified_facts if f.get('confidence') == 'unknown')
         
-        # Calculate by confidence level
-        high_conf = sum(1 for f in verified_facts if f.get('confidence') == 'high')
-        medium_conf = sum(1 for f in verified_facts if f.get('confidence') == 'medium')
-        low_conf = sum(1 for f in verified_facts if f.get('confidence') == 'low')
-        
-        return {
+        # Read each fact dict once: count it, add its weighted score and put
+        # it in its verification status bucket in the same sweep
+        weights = self.CONFIDENCE_WEIGHTS
+        verified = unverified = 0
+        high_conf = medium_conf = low_conf = unknown = 0
+        total_points = 0.0
+        verified_facts_list, uncertain, contradicted = [], [], []
+        for fact in verified_facts:
+            code = CONFIDENCE_CODES.get(fact.get('confidence'), OTHER_CODE)
+            flag = fact.get('verified')
+            total_points += weights[code]
+            
+            if flag is True:
+                verified += 1
+            elif flag is False and code != UNKNOWN_CODE:
+                unverified += 1
+            
+            if code == HIGH_CODE:
+                high_conf += 1
+                if flag is True:
+                    verified_facts_list.append(fact)
+            elif code == MEDIUM_CODE:
+                medium_conf += 1
+                uncertain.append(fact)
+            elif code == LOW_CODE:
+                low_conf += 1
+                if flag is False:
+                    contradicted.append(fact)
+            elif code == UNKNOWN_CODE:
+                unknown += 1
+                uncertain.append(fact)
+        
+        stats = {
             "total_facts": total,
             "verified": verified,
             "unverified": unverified,
@@ -74,34 +114,16 @@ class ConfidenceScorer:
             "medium_confidence": medium_conf,
             "low_confidence": low_conf
         }
-    
-    def _calculate_confidence_score(self, stats: Dict, verified_facts: List[Dict]) -> float:
-        """
-        Calculate weighted confidence score
-        High confidence facts = 1.0 points
-        Medium confidence facts = 0.6 points
-        Low confidence facts = 0.2 points
-        Unknown = 0.0 points
-        """
-        if stats["total_facts"] == 0:
-            return 0.0
         
-        total_points = 0.0
-        
-        for fact in verified_facts:
-            confidence = fact.get('confidence', 'unknown')
-            
-            if confidence == 'high':
-                total_points += 1.0
-            elif confidence == 'medium':
-                total_points += 0.6
-            elif confidence == 'low':
-                total_points += 0.2
-            else:  # unknown
-                total_points += 0.0
+        categories = {
+            "verified": verified_facts_list,
+            "uncertain": uncertain,
+            "contradicted": contradicted
+        }
         
         # Average score
-        return total_points / stats["total_facts"]
+        score = total_points / total if total else 0.0
+        return stats, score, categories
     
     def _determine_confidence_level(self, score: float, stats: Dict) -> tuple:
         """
@@ -140,18 +162,6 @@ class ConfidenceScorer:
                 return f"Uncertain: Unable to verify most claims"
         else:
             return "No verifiable facts found"
-    
-    def _categorize_facts(self, verified_facts: List[Dict]) -> Dict:
-        """Categorize facts by verification status"""
-        verified = [f for f in verified_facts if f.get('verified') == True and f.get('confidence') == 'high']
-        uncertain = [f for f in verified_facts if f.get('confidence') in ['medium', 'unknown']]
-        contradicted = [f for f in verified_facts if f.get('verified') == False and f.get('confidence') == 'low']
-        
-        return {
-            "verified": verified,
-            "uncertain": uncertain,
-            "contradicted": contradicted
-        }
 
 # Create singleton instance
 confidence_scorer = ConfidenceScorer()
\ No newline at end of file
@@ -1,113 +1,215 @@
 import logging
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import re
+from session_store import LRUStore
 
 logger = logging.getLogger(__name__)
 
+# Entity types grouped by how they are checked
+NUMERIC_TYPES = frozenset(['CARDINAL', 'QUANTITY', 'MONEY', 'MEASUREMENT', 'POPULATION'])
+NAMED_ENTITY_TYPES = frozenset(['GPE', 'LOC', 'PERSON', 'ORG'])
+
+# Precompiled patterns
+SCALED_NUMBER_PATTERN = re.compile(r'([\d.][\d.,]*)\s*(billion|million|thousand)?', re.IGNORECASE)
+YEAR_PATTERN = re.compile(r'(\d{4})')
+IS_STATEMENT_PATTERN = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+(.+)')
+
+SCALE_MULTIPLIERS = {
+    'billion': 1_000_000_000,
+    'million': 1_000_000,
+    'thousand': 1_000,
+}
+
+def percent_difference(a: float, b: float) -> float:
+    """Relative difference between two values, as a percentage of the larger one"""
+    largest = max(a, b)
+    if largest == 0:
+        return 0.0
+    return abs(a - b) / largest * 100
+
 class ContradictionDetector:
     """Detect contradictions in conversation history"""
     
-    def __init__(self):
-        # Store facts by session
-        self.session_facts = {}  # {session_id: [facts]}
+    def __init__(self, max_sessions: int = 10_000, session_ttl: float = 3600, max_facts_per_session: int = 500):
+        # Store facts by session, dropping idle and least recently used sessions
+        # Each session keeps its facts in order, plus the same facts bucketed
+        # by entity type so only comparable facts get checked
+        self.sessions = LRUStore(maxsize=max_sessions, ttl=session_ttl)  # {session_id: {"facts": [facts], "index": {entity_type: [facts]}}}
+        self.max_facts_per_session = max_facts_per_session
         
     def add_facts(self, session_id: str, facts: List[Dict]):
         """Add new facts to session history"""
-        if session_id not in self.session_facts:
-            self.session_facts[session_id] = []
-        
-        self.session_facts[session_id].extend(facts)
-        logger.info(f"Session {session_id}: Now tracking {len(self.session_facts[session_id])} total facts")
+        self._add_prepared(session_id, [self._prepare_fact(fact) for fact in facts])
     
     def detect_contradictions(self, session_id: str, new_facts: List[Dict]) -> List[Dict]:
         """
         Check if new facts contradict previous facts in the conversation
         Returns list of contradictions found
         """
-        if session_id not in self.session_facts:
+        session = self.sessions.get(session_id)
+        if session is None:
             return []
         
-        previous_facts = self.session_facts[session_id]
+        contradictions = self._find_contradictions(session["index"], new_facts, self._prepare_fact)
+        
+        if contradictions:
+            logger.warning(f"Session {session_id}: Found {len(contradictions)} contradiction(s)")
+        
+        return contradictions
+    
+    def detect_and_add(self, session_id: str, new_facts: List[Dict]) -> List[Dict]:
+        """
+        Check new facts against the conversation so far, then add them to it
+        Same as detect_contradictions followed by add_facts, but each fact is
+        only prepared once
+        Returns list of contradictions found
+        """
+        facts = [self._prepare_fact(fact) for fact in new_facts]
+        
+        contradictions = []
+        session = self.sessions.get(session_id)
+        if session is not None:
+            contradictions = self._find_contradictions(session["index"], facts, lambda fact: fact)
+            if contradictions:
+                logger.warning(f"Session {session_id}: Found {len(contradictions)} contradiction(s)")
+        
+        self._add_prepared(session_id, facts)
+        return contradictions
+    
+    def _find_contradictions(self, index: Dict, new_facts: List[Dict], prepare: Callable[[Dict], Dict]) -> List[Dict]:
+        """
+        Compare each new fact with the indexed previous facts of its type
+        prepare is applied to a new fact only once it has something to be compared with
+        """
         contradictions = []
         
         for new_fact in new_facts:
-            # Check against all previous facts
+            entity_type = new_fact['entity_type']
+            
+            # Only previous facts of the same entity type are comparable,
+            # and some types have no contradiction check at all
+            previous_facts = index.get(entity_type)
+            if not previous_facts:
+                continue
+            check = self._checker_for(entity_type)
+            
+            new_fact = prepare(new_fact)
             for old_fact in previous_facts:
-                contradiction = self._check_fact_pair(new_fact, old_fact)
+                contradiction = check(new_fact, old_fact)
                 if contradiction:
                     contradictions.append(contradiction)
         
-        if contradictions:
-            logger.warning(f"Session {session_id}: Found {len(contradictions)} contradiction(s)")
-        
         return contradictions
     
-    def _check_fact_pair(self, fact1: Dict, fact2: Dict) -> Optional[Dict]:
+    def _add_prepared(self, session_id: str, facts: List[Dict]):
+        """Add already prepared facts to session history"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = {"facts": [], "index": {}}
+            self.sessions[session_id] = session
+        
+        session_facts = session["facts"]
+        session_facts.extend(facts)
+        
+        index = session["index"]
+        if len(session_facts) > self.max_facts_per_session:
+            # Keep only the most recent facts and rebuild the index from them
+            del session_facts[:-self.max_facts_per_session]
+            index.clear()
+            facts = session_facts
+        
+        for fact in facts:
+            # Only facts of a checkable type are ever compared
+            if self._checker_for(fact['entity_type']):
+                index.setdefault(fact['entity_type'], []).append(fact)
+        logger.info(f"Session {session_id}: Now tracking {len(session_facts)} total facts")
+    
+    def _prepare_fact(self, fact: Dict) -> Dict:
         """
-        Check if two facts contradict each other
-        Returns contradiction details if found, None otherwise
+        Copy a fact with the values and word sets used by pairwise checks
+        cached on it, so each fact is parsed once instead of once per comparison
         """
-        # Must be about same entity type
-        if fact1['entity_type'] != fact2['entity_type']:
-            return None
+        prepared = dict(fact)
+        entity_type = fact['entity_type']
+        
+        # Numeric value or year stated by the fact
+        prepared['_number'] = self._extract_number(fact['entity']) if entity_type in NUMERIC_TYPES else None
+        prepared['_year'] = self._extract_year(fact['entity']) if entity_type == 'DATE' else None
         
-        entity_type = fact1['entity_type']
+        # First few words of the sentence (usually the subject)
+        prepared['_subject_words'] = frozenset(fact['sentence'].lower().split()[:5])
         
+        # Words of the 'X is Y' parts, for entity facts
+        statement = None
+        if entity_type in NAMED_ENTITY_TYPES:
+            pattern = self._extract_is_statement(fact['sentence'])
+            if pattern:
+                subject, claim = pattern
+                statement = (subject, frozenset(subject.lower().split()), frozenset(claim.lower().split()))
+        prepared['_is_statement'] = statement
+        
+        return prepared
+    
+    def _checker_for(self, entity_type: str) -> Optional[Callable[[Dict, Dict], Optional[Dict]]]:
+        """
+        Get the check that decides whether two facts of this entity type contradict
+        Returns None if facts of this type are never compared
+        """
         # Check for numeric contradictions
-        if entity_type in ['CARDINAL', 'QUANTITY', 'MONEY', 'MEASUREMENT', 'POPULATION']:
-            return self._check_numeric_contradiction(fact1, fact2)
+        if entity_type in NUMERIC_TYPES:
+            return self._check_numeric_contradiction
         
         # Check for date contradictions
         if entity_type == 'DATE':
-            return self._check_date_contradiction(fact1, fact2)
+            return self._check_date_contradiction
         
         # Check for entity contradictions (same subject, different claims)
-        if entity_type in ['GPE', 'LOC', 'PERSON', 'ORG']:
-            return self._check_entity_contradiction(fact1, fact2)
+        if entity_type in NAMED_ENTITY_TYPES:
+            return self._check_entity_contradiction
         
         return None
     
     def _check_numeric_contradiction(self, fact1: Dict, fact2: Dict) -> Optional[Dict]:
         """Check if numeric facts contradict"""
-        # Extract numbers from both facts
-        num1 = self._extract_number(fact1['entity'])
-        num2 = self._extract_number(fact2['entity'])
+        # Numbers stated by both facts
+        num1 = fact1['_number']
+        num2 = fact2['_number']
         
         if num1 is None or num2 is None:
             return None
         
-        # Check if they're talking about the same thing
-        if not self._same_subject(fact1['sentence'], fact2['sentence']):
+        # Check if numbers differ significantly (more than 20% difference)
+        # before the more expensive same-subject comparison
+        diff_percent = percent_difference(num1, num2)
+        if diff_percent <= 20:
             return None
         
-        # Check if numbers differ significantly (more than 20% difference)
-        diff_percent = abs(num1 - num2) / max(num1, num2) * 100
-        
-        if diff_percent > 20:
-            return {
-                "type": "numeric_contradiction",
-                "severity": "high" if diff_percent > 50 else "medium",
-                "previous_claim": fact2['sentence'],
-                "current_claim": fact1['sentence'],
-                "previous_value": fact2['entity'],
-                "current_value": fact1['entity'],
-                "difference": f"{diff_percent:.1f}% difference",
-                "message": f"Contradiction detected: Different values for the same claim"
-            }
+        # Check if they're talking about the same thing
+        if not self._same_subject(fact1, fact2):
+            return None
         
-        return None
+        return {
+            "type": "numeric_contradiction",
+            "severity": "high" if diff_percent > 50 else "medium",
+            "previous_claim": fact2['sentence'],
+            "current_claim": fact1['sentence'],
+            "previous_value": fact2['entity'],
+            "current_value": fact1['entity'],
+            "difference": f"{diff_percent:.1f}% difference",
+            "message": f"Contradiction detected: Different values for the same claim"
+        }
     
     def _check_date_contradiction(self, fact1: Dict, fact2: Dict) -> Optional[Dict]:
         """Check if dates contradict"""
-        # Extract years
-        year1 = self._extract_year(fact1['entity'])
-        year2 = self._extract_year(fact2['entity'])
+        # Years stated by both facts
+        year1 = fact1['_year']
+        year2 = fact2['_year']
         
         if year1 is None or year2 is None or year1 == year2:
             return None
         
         # Check if talking about same subject
-        if not self._same_subject(fact1['sentence'], fact2['sentence']):
+        if not self._same_subject(fact1, fact2):
             return None
         
         return {
@@ -127,15 +229,15 @@ class ContradictionDetector:
         # Example: "Paris is in France" vs "Paris is in Germany"
         
         # Look for "is" statements
-        pattern1 = self._extract_is_statement(fact1['sentence'])
-        pattern2 = self._extract_is_statement(fact2['sentence'])
+        pattern1 = fact1['_is_statement']
+        pattern2 = fact2['_is_statement']
         
         if pattern1 and pattern2:
-            subject1, claim1 = pattern1
-            subject2, claim2 = pattern2
+            subject1, subject_words1, claim_words1 = pattern1
+            _, subject_words2, claim_words2 = pattern2
             
             # Same subject, different claims
-            if self._similar_text(subject1, subject2) and not self._similar_text(claim1, claim2):
+            if self._similar_text(subject_words1, subject_words2) and not self._similar_text(claim_words1, claim_words2):
                 return {
                     "type": "entity_contradiction",
                     "severity": "high",
@@ -148,23 +250,12 @@ class ContradictionDetector:
     
     def _extract_number(self, text: str) -> Optional[float]:
         """Extract numeric value from text"""
-        # Remove commas, extract number
-        text_clean = text.replace(',', '')
-        
-        # Handle millions, billions
-        multiplier = 1
-        if 'billion' in text.lower():
-            multiplier = 1_000_000_000
-        elif 'million' in text.lower():
-            multiplier = 1_000_000
-        elif 'thousand' in text.lower():
-            multiplier = 1_000
-        
-        # Extract number
-        match = re.search(r'([\d.]+)', text_clean)
+        # Number plus an optional scale word right after it ("14 million")
+        match = SCALED_NUMBER_PATTERN.search(text)
         if match:
+            multiplier = SCALE_MULTIPLIERS.get((match.group(2) or '').lower(), 1)
             try:
-                return float(match.group(1)) * multiplier
+                return float(match.group(1).replace(',', '')) * multiplier
             except:
                 return None
         
@@ -172,7 +263,7 @@ class ContradictionDetector:
     
     def _extract_year(self, text: str) -> Optional[int]:
         """Extract year from text"""
-        match = re.search(r'(\d{4})', text)
+        match = YEAR_PATTERN.search(text)
         if match:
             try:
                 return int(match.group(1))
@@ -180,14 +271,10 @@ class ContradictionDetector:
                 return None
         return None
     
-    def _same_subject(self, sentence1: str, sentence2: str) -> bool:
-        """Check if two sentences are about the same subject"""
-        # Extract first few words (usually the subject)
-        words1 = sentence1.lower().split()[:5]
-        words2 = sentence2.lower().split()[:5]
-        
-        # Check for overlap
-        common = set(words1) & set(words2)
+    def _same_subject(self, fact1: Dict, fact2: Dict) -> bool:
+        """Check if two prepared facts are about the same subject"""
+        # Check for overlap between the first few words of each sentence
+        common = fact1['_subject_words'] & fact2['_subject_words']
         
         # If at least 2 significant words overlap, likely same subject
         return len(common) >= 2
@@ -195,17 +282,14 @@ class ContradictionDetector:
     def _extract_is_statement(self, sentence: str) -> Optional[tuple]:
         """Extract 'X is Y' patterns from sentence"""
         # Pattern: "Paris is the capital"
-        match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+(.+)', sentence)
+        match = IS_STATEMENT_PATTERN.search(sentence)
         if match:
             return (match.group(1), match.group(2))
         return None
     
-    def _similar_text(self, text1: str, text2: str) -> bool:
-        """Check if two texts are similar"""
+    def _similar_text(self, words1: frozenset, words2: frozenset) -> bool:
+        """Check if two texts are similar, given their lowercased word sets"""
         # Simple word overlap check
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
         if not words1 or not words2:
             return False
         
@@ -214,19 +298,20 @@ class ContradictionDetector:
     
     def get_session_summary(self, session_id: str) -> Dict:
         """Get summary of facts tracked in a session"""
-        if session_id not in self.session_facts:
+        session = self.sessions.get(session_id)
+        if session is None:
             return {"total_facts": 0, "facts": []}
         
-        facts = self.session_facts[session_id]
+        facts = session["facts"]
         return {
             "total_facts": len(facts),
-            "facts": facts
+            # Drop the cached word sets added by _prepare_fact
+            "facts": [{k: v for k, v in f.items() if not k.startswith('_')} for f in facts]
         }
     
     def clear_session(self, session_id: str):
         """Clear facts for a session"""
-        if session_id in self.session_facts:
-            del self.session_facts[session_id]
+        if self.sessions.pop(session_id) is not None:
             logger.info(f"Cleared session {session_id}")
 
 # Create singleton instance
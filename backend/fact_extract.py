@@ -1,137 +1,191 @@
 import spacy
 import re
-from typing import List, Dict
+import sys
+import threading
+from bisect import bisect_left
+from typing import Iterator, List, Dict, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-    logger.info("spaCy model loaded successfully")
-except:
-    logger.error("spaCy model not found. Run: python -m spacy download en_core_web_sm")
-    nlp = None
+# Numeric and date patterns as (group name, fact type, pattern). Number
+# patterns may not start in the middle of another number, so the
+# overlapping search in _find_pattern_facts only picks up matches
+# that a separate pass over each pattern would also have found.
+FACT_PATTERNS = [
+    # Patterns like "population of X million", "costs $X", "X meters tall"
+    ("POPULATION", "POPULATION", r'(?<![\d,.])(?P<POPULATION>[\d,.]+ (?:million|billion|thousand|hundred)(?: people)?)'),
+    ("MONEY", "MONEY", r'(?P<MONEY>\$[\d,.]+)'),
+    ("MEASUREMENT", "MEASUREMENT", r'(?<![\d,.])(?P<MEASUREMENT>[\d,.]+ (?:meters|feet|kilometers|miles|km|ft))'),
+    ("WEIGHT", "WEIGHT", r'(?<![\d,.])(?P<WEIGHT>[\d,.]+ (?:kg|tons|pounds|grams))'),
+    ("TEMPERATURE", "TEMPERATURE", r'(?<![\d,.])(?P<TEMPERATURE>[\d,.]+ (?:degrees|°[CF]))'),
+    # Patterns like "in 2020", "built in 1889", "founded in 1995"
+    ("DATE", "DATE", r'(?:in|during|since|from)\s+(?P<DATE>\d{4})'),
+    ("EVENT_DATE", "DATE", r'(?:established|built|founded|created|born|died)\s+(?:in\s+)?(?P<EVENT_DATE>\d{4})'),
+]
+
+FACT_PATTERN = re.compile("|".join(pattern for _, _, pattern in FACT_PATTERNS), re.IGNORECASE)
+FACT_PATTERN_TYPES = {group: fact_type for group, fact_type, _ in FACT_PATTERNS}
+# Position of each pattern in FACT_PATTERNS, facts are reported grouped by it
+FACT_PATTERN_RANKS = {group: rank for rank, (group, _, _) in enumerate(FACT_PATTERNS)}
+
+# Named entity labels kept as facts (people, places, orgs, dates, amounts)
+NER_LABELS = frozenset(["PERSON", "GPE", "LOC", "ORG", "DATE", "TIME", "MONEY", "QUANTITY", "CARDINAL"])
+
+# spaCy model, loaded on first use by _get_nlp so importing this module
+# (and starting the API) does not pay for the model load
+nlp = None
+_nlp_load_failed = False
+# Requests are extracted on worker threads; only one of them loads the model
+_nlp_lock = threading.Lock()
+
+def _load_nlp():
+    """Load the spaCy model into nlp, or set _nlp_load_failed"""
+    global nlp, _nlp_load_failed
+    # Only NER and sentence boundaries are used. The ner component in
+    # en_core_web_sm has its own tok2vec, so the shared tok2vec, tagger,
+    # parser and lemmatizer stages can be skipped and the rule-based
+    # sentencizer supplies ent.sent instead of the dependency parse.
+    try:
+        model = spacy.load(
+            "en_core_web_sm",
+            exclude=["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer"]
+        )
+        model.add_pipe("sentencizer", before="ner")
+        # Published only once complete, since _get_nlp reads it without the lock
+        nlp = model
+        logger.info("spaCy model loaded successfully")
+    except:
+        logger.error("spaCy model not found. Run: python -m spacy download en_core_web_sm")
+        _nlp_load_failed = True
+
+def _get_nlp():
+    """
+    Load the spaCy model the first time it is needed
+    Returns None if the model is not installed
+    """
+    if nlp is None and not _nlp_load_failed:
+        with _nlp_lock:
+            # Another thread may have loaded it while this one waited
+            if nlp is None and not _nlp_load_failed:
+                _load_nlp()
+    return nlp
 
 class FactExtractor:
     """Extract factual claims from text"""
     
-    def __init__(self):
-        self.nlp = nlp
+    @property
+    def nlp(self):
+        return _get_nlp()
+    
+    def warm_up(self) -> bool:
+        """
+        Load the spaCy model now instead of on the first extraction
+        Returns whether it is available
+        """
+        return _get_nlp() is not None
     
     def extract_facts(self, text: str) -> List[Dict]:
         """
         Extract factual claims from text
         Returns list of facts with metadata
         """
-        if not self.nlp:
+        nlp = self.nlp
+        if not nlp:
             return []
         
-        facts = []
-        doc = self.nlp(text)
+        return self._extract_from_doc(nlp(text))
+    
+    def extract_facts_batch(self, texts: List[str], batch_size: int = 32) -> List[List[Dict]]:
+        """
+        Extract factual claims from several texts at once
+        Returns one list of facts per input text
+        """
+        nlp = self.nlp
+        if not nlp:
+            return [[] for _ in texts]
+        
+        return [self._extract_from_doc(doc) for doc in nlp.pipe(texts, batch_size=batch_size)]
+    
+    def _extract_from_doc(self, doc) -> List[Dict]:
+        """Extract facts from an already processed spaCy doc"""
+        # Facts are de-duplicated as they are found, keyed on entity + sentence
+        # This allows multiple facts per sentence
+        facts = {}
         
         # Extract named entities (people, places, orgs, dates)
         for ent in doc.ents:
-            if ent.label_ in ["PERSON", "GPE", "LOC", "ORG", "DATE", "TIME", "MONEY", "QUANTITY", "CARDINAL"]:
+            # spaCy builds a new label string on every access; interning it
+            # lets the type comparisons downstream match by identity
+            label = sys.intern(ent.label_)
+            if label in NER_LABELS:
                 # Get the sentence containing this entity
-                sentence = self._get_sentence_for_entity(ent, doc)
-                
-                facts.append({
-                    "claim": sentence.text.strip(),
-                    "entity": ent.text,
-                    "entity_type": ent.label_,
-                    "sentence": sentence.text.strip()
-                })
+                self._add_fact(facts, ent.text, label, ent.sent.text.strip())
         
-        # Extract numeric facts (population, measurements, etc.)
-        numeric_facts = self._extract_numeric_facts(text)
-        facts.extend(numeric_facts)
+        # Extract numeric facts (population, measurements, etc.) and date patterns
+        for entity, entity_type, sentence in self._find_pattern_facts(doc.text):
+            self._add_fact(facts, entity, entity_type, sentence)
         
-        # Extract date patterns
-        date_facts = self._extract_date_patterns(text)
-        facts.extend(date_facts)
-        
-        # Remove duplicates based on entity + sentence combination
-        # This allows multiple facts per sentence
-        seen = set()
-        unique_facts = []
-        for fact in facts:
-            # Create unique key from entity and first 50 chars of sentence
-            key = f"{fact['entity']}:{fact['sentence'][:50]}"
-            if key not in seen:
-                seen.add(key)
-                unique_facts.append(fact)
+        unique_facts = list(facts.values())
         
         logger.info(f"Extracted {len(unique_facts)} unique facts")
         return unique_facts
     
-    def _get_sentence_for_entity(self, entity, doc):
-        """Get the sentence containing an entity"""
-        for sent in doc.sents:
-            if entity.start >= sent.start and entity.end <= sent.end:
-                return sent
-        return doc[entity.start:entity.end]
+    def _add_fact(self, facts: Dict, entity: str, entity_type: str, sentence: str):
+        """Add a fact unless one with the same entity and sentence start is already present"""
+        # Unique key from entity and first 50 chars of sentence; the first fact wins
+        key = (entity, sentence[:50])
+        if key not in facts:
+            facts[key] = {
+                "claim": sentence,
+                "entity": entity,
+                "entity_type": entity_type,
+                "sentence": sentence
+            }
     
-    def _extract_numeric_facts(self, text: str) -> List[Dict]:
-        """Extract facts with numbers (population, measurements, prices)"""
-        facts = []
-        
-        # Patterns like "population of X million", "costs $X", "X meters tall"
-        patterns = [
-            (r'([\d,.]+ (?:million|billion|thousand|hundred)(?: people)?)', "POPULATION"),
-            (r'(\$[\d,.]+)', "MONEY"),
-            (r'([\d,.]+ (?:meters|feet|kilometers|miles|km|ft))', "MEASUREMENT"),
-            (r'([\d,.]+ (?:kg|tons|pounds|grams))', "WEIGHT"),
-            (r'([\d,.]+ (?:degrees|°[CF]))', "TEMPERATURE"),
-        ]
-        
-        for pattern, fact_type in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                # Get the full sentence containing this number
-                sent_start = text.rfind('.', 0, match.start()) + 1
-                sent_end = text.find('.', match.end())
-                if sent_end == -1:
-                    sent_end = len(text)
-                sentence = text[sent_start:sent_end].strip()
-                
-                facts.append({
-                    "claim": sentence,
-                    "entity": match.group(1).strip(),
-                    "entity_type": fact_type,
-                    "sentence": sentence
-                })
-        
-        return facts
-    
-    def _extract_date_patterns(self, text: str) -> List[Dict]:
-        """Extract date-related facts"""
-        facts = []
+    def _find_pattern_facts(self, text: str) -> Iterator[Tuple[str, str, str]]:
+        """
+        Find facts with numbers (population, measurements, prices) and dates
+        Yields (entity, entity_type, sentence) grouped by pattern, in the
+        order of FACT_PATTERNS, and in order of position within each pattern
+        """
+        # Sentence boundaries, found once for all matches (str.find scans in C
+        # instead of visiting every character in Python)
+        periods = []
+        period = text.find('.')
+        while period != -1:
+            periods.append(period)
+            period = text.find('.', period + 1)
         
-        # Patterns like "in 2020", "built in 1889", "founded in 1995"
-        date_patterns = [
-            (r'(?:in|during|since|from)\s+(\d{4})', "DATE"),
-            (r'(?:established|built|founded|created|born|died)\s+(?:in\s+)?(\d{4})', "DATE"),
-        ]
+        # Several matches usually share a sentence; slice and strip it once
+        sentences = {}
         
-        for pattern, fact_type in date_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                # Get the full sentence
-                sent_start = text.rfind('.', 0, match.start()) + 1
-                sent_end = text.find('.', match.end())
-                if sent_end == -1:
-                    sent_end = len(text)
-                sentence = text[sent_start:sent_end].strip()
-                
-                facts.append({
-                    "claim": sentence,
-                    "entity": match.group(1),
-                    "entity_type": fact_type,
-                    "sentence": sentence
-                })
+        found = []
+        # A number can match more than one pattern ("$5 million" is both
+        # MONEY and POPULATION), so resume one character after each match
+        # start rather than after its end
+        match = FACT_PATTERN.search(text)
+        while match:
+            # Get the full sentence containing this match
+            before = bisect_left(periods, match.start())
+            after = bisect_left(periods, match.end())
+            sentence = sentences.get((before, after))
+            if sentence is None:
+                sent_start = periods[before - 1] + 1 if before else 0
+                sent_end = periods[after] if after < len(periods) else len(text)
+                sentence = sentences[(before, after)] = text[sent_start:sent_end].strip()
+            
+            group = match.lastgroup
+            found.append((FACT_PATTERN_RANKS[group], match.group(group).strip(), FACT_PATTERN_TYPES[group], sentence))
+            
+            match = FACT_PATTERN.search(text, match.start() + 1)
         
-        return facts
+        # The combined search finds matches by position; sort them back into
+        # pattern order (the sort is stable, so position order is kept within
+        # each pattern)
+        found.sort(key=lambda item: item[0])
+        for _, entity, entity_type, sentence in found:
+            yield entity, entity_type, sentence
 
 # Create singleton instance
 fact_extractor = FactExtractor()
\ No newline at end of file
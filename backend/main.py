@@ -4,14 +4,19 @@ from pydantic import BaseModel
 from dotenv import load_dotenv
 import google.generativeai as genai
 import os
+import asyncio
+import json
+import hashlib
 import logging
 from typing import Optional, List, Dict
 import uuid
+from collections import deque
 from fact_extract import fact_extractor 
-from refdatabase import wikipedia_verifier
+from refdatabase import get_wikipedia_verifier
 from confidence_scorer import confidence_scorer
 from contradiction_detector import contradiction_detector
-from response_formatter import response_formatter
+from response_formatter import get_response_formatter
+from session_store import LRUStore
 
 
 # Load environment variables
@@ -37,8 +42,20 @@ app.add_middleware(
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 model = genai.GenerativeModel('gemini-flash-latest')  
 
-# In-memory conversation storage
-conversations = {}
+# In-memory conversation storage, bounded so idle sessions don't pile up
+conversations = LRUStore(maxsize=10_000, ttl=3600)
+
+# Conversation turns (user message + model reply) kept per session and
+# sent to Gemini as context; older turns are dropped
+MAX_CONTEXT_TURNS = 20
+
+# Gemini response and verified facts, keyed by conversation history + message
+response_cache = LRUStore(maxsize=1_000, ttl=3600)
+
+def response_cache_key(history: List[Dict], message: str) -> str:
+    """Hash the conversation so far plus the new message into a cache key"""
+    payload = json.dumps([history, message], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
 
 # Request/Response models
 class ChatRequest(BaseModel):
@@ -68,44 +85,62 @@ async def chat(request: ChatRequest):
         logger.info(f"Session {session_id}: Received message: {request.message}")
         
         # Get or create conversation history
-        if session_id not in conversations:
-            conversations[session_id] = []
-        
-        # Add user message to history
-        conversations[session_id].append({
-            "role": "user",
-            "parts": [request.message]
-        })
-        
-        # Create chat with history
-        chat = model.start_chat(history=conversations[session_id][:-1])
-        
-        # Send message and get response
-        response = chat.send_message(request.message)
-        response_text = response.text
-        
-        # Add assistant response to history
-        conversations[session_id].append({
-            "role": "model",
-            "parts": [response_text]
-        })
-        
-        # Extract facts from response
-        extracted_facts = fact_extractor.extract_facts(response_text)
-        logger.info(f"Session {session_id}: Extracted {len(extracted_facts)} facts")
-        
-        # Verify facts against Wikipedia
-        verified_facts = wikipedia_verifier.verify_facts(extracted_facts)
-        logger.info(f"Session {session_id}: Verified {len(verified_facts)} facts")
+        history = conversations.get(session_id)
+        if history is None:
+            history = deque(maxlen=2 * MAX_CONTEXT_TURNS)
+            conversations[session_id] = history
+        
+        # Context sent to Gemini: the last MAX_CONTEXT_TURNS turns before this message
+        # (a snapshot; other requests for this session may finish while this
+        # one awaits Gemini, and only append to history once they have)
+        context = list(history)
+        
+        # Same message after the same history gets the same response and facts
+        cache_key = response_cache_key(context, request.message)
+        cached = response_cache.get(cache_key)
+        
+        if cached is not None:
+            response_text, verified_facts = cached
+            logger.info(f"Session {session_id}: Served response and {len(verified_facts)} verified facts from cache")
+        else:
+            # Create chat with history
+            chat = model.start_chat(history=context)
+            
+            # Send message and get response
+            # (blocking network call and CPU-bound NER run in worker threads
+            # so the event loop keeps serving other requests meanwhile)
+            response = await asyncio.to_thread(chat.send_message, request.message)
+            response_text = response.text
+            
+            # Extract facts from response
+            extracted_facts = await asyncio.to_thread(fact_extractor.extract_facts, response_text)
+            logger.info(f"Session {session_id}: Extracted {len(extracted_facts)} facts")
+            
+            # Verify facts against Wikipedia
+            verified_facts = await get_wikipedia_verifier().verify_facts_async(extracted_facts)
+            logger.info(f"Session {session_id}: Verified {len(verified_facts)} facts")
+            
+            response_cache[cache_key] = (response_text, verified_facts)
+        
+        # Add user message and assistant response to history together, so
+        # concurrent requests can't interleave their turns
+        history.extend([
+            {
+                "role": "user",
+                "parts": [request.message]
+            },
+            {
+                "role": "model",
+                "parts": [response_text]
+            }
+        ])
         
         # *** NEW: Check for contradictions with previous messages ***
-        contradictions = contradiction_detector.detect_contradictions(session_id, verified_facts)
+        # and add facts to session history (for future contradiction checks)
+        contradictions = contradiction_detector.detect_and_add(session_id, verified_facts)
         if contradictions:
             logger.warning(f"Session {session_id}: ⚠️  Found {len(contradictions)} contradiction(s)!")
         
-        # Add facts to session history (for future contradiction checks)
-        contradiction_detector.add_facts(session_id, verified_facts)
-        
         # Calculate confidence score
         confidence_report = confidence_scorer.score_response(verified_facts)
         
@@ -117,7 +152,7 @@ async def chat(request: ChatRequest):
             confidence_report['emoji'] = '🔴'
             confidence_report['summary'] = f"⚠️  {len(contradictions)} contradiction(s) detected in conversation"
         
-        formatted_response = response_formatter.format_response(response_text, verified_facts,contradictions)
+        formatted_response = get_response_formatter().format_response(response_text, verified_facts,contradictions)
         
         logger.info(f"Session {session_id}: {confidence_report['emoji']} Overall confidence: {confidence_report['overall_confidence']} ({confidence_report['confidence_score']})")
         
@@ -139,14 +174,14 @@ async def chat(request: ChatRequest):
 # Get conversation history
 @app.get("/history/{session_id}")
 async def get_history(session_id: str):
-    if session_id not in conversations:
+    history = conversations.get(session_id)
+    if history is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    return {"session_id": session_id, "history": conversations[session_id]}
+    return {"session_id": session_id, "history": list(history)}
 
 @app.delete("/session/{session_id}")
 async def clear_session(session_id: str):
     """Clear conversation and fact history for a session"""
-    if session_id in conversations:
-        del conversations[session_id]
+    conversations.pop(session_id)
     contradiction_detector.clear_session(session_id)
     return {"message": f"Session {session_id} cleared"}
\ No newline at end of file
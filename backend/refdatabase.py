@@ -1,19 +1,117 @@
 import wikipediaapi
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import os
+import shelve
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence
 import re
+from session_store import LRUStore
 
 logger = logging.getLogger(__name__)
 
+# Entity types grouped by how they are looked up and verified
+NAMED_ENTITY_TYPES = frozenset(["GPE", "LOC", "PERSON", "ORG"])
+VALUE_TYPES = frozenset(["DATE", "CARDINAL", "QUANTITY", "MONEY", "MEASUREMENT", "POPULATION", "WEIGHT", "TEMPERATURE"])
+
+# Patterns used on every verification, compiled once
+# Subject extraction: capitalized phrase at the start, after "the", or anywhere
+# The first two are tried in one search: a phrase at the start wins,
+# otherwise the leftmost "the" phrase. Folding the third in as well would
+# let an earlier capitalized word beat a later "the" phrase
+SUBJECT_PATTERN = re.compile(
+    r'^(?P<start>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)|[Tt]he\s+(?P<the>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'
+)
+CAPITALIZED_PHRASE_PATTERN = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)')
+# Commas and whitespace (what r'[,\s]' matches), stripped before comparing values
+# The last Unicode whitespace character is U+3000
+COMMAS_WHITESPACE_TABLE = dict.fromkeys(
+    code for code in range(0x3001) if chr(code) == ',' or chr(code).isspace()
+)
+NUMBER_PATTERN = re.compile(r'([\d.]+)')
+NUMBER_WITH_UNIT_PATTERN = re.compile(r'([\d.]+)\s*(?:million|billion|thousand|meters|feet|km)?', re.IGNORECASE)
+
+# Fetched pages are also kept on disk, so restarts and test runs don't re-fetch them
+DISK_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".wiki_cache")
+DISK_CACHE_TTL = 7 * 24 * 3600  # 7 days
+# Pages kept on disk; the least recently used are evicted past this
+DISK_CACHE_MAX_ENTRIES = 500
+# Shelve key of the {search_query: fetched_at} index, least recently used first
+# (versioned with the page record format; a file with another index is discarded)
+DISK_CACHE_INDEX_KEY = "\0index-2"
+
 class WikipediaVerifier:
     """Verify facts against Wikipedia"""
     
-    def __init__(self):
+    def __init__(self, disk_cache_path: Optional[str] = DISK_CACHE_PATH, max_workers: int = 16,
+                 max_concurrent_requests: int = 10):
         # Initialize Wikipedia API with user agent
         self.wiki = wikipediaapi.Wikipedia(
             language='en',
             user_agent='HallucinationPrevention/1.0 (Educational Project)'
         )
+        # Keep-alive connection pool sized for the fetch threads, with a few
+        # quick retries for transient connection errors and 5xx responses
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(total=3, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504])
+        )
+        # _session is private to wikipedia-api; without it the library's own
+        # session is used as is
+        session = getattr(self.wiki, "_session", None)
+        if session is not None:
+            session.mount("https://", adapter)
+        else:
+            logger.warning("Wikipedia session not found, using default connection pooling")
+        
+        # Fetched pages by search query; pages rarely change within an hour
+        # Long articles run to hundreds of KB each, so only a few are kept
+        self.page_cache = LRUStore(maxsize=64, ttl=3600)
+        # Page text with commas and whitespace removed, by page URL; only
+        # needed while a batch of facts is checked against the page
+        self._clean_text_cache = LRUStore(maxsize=8, ttl=60)
+        
+        # Persistent page cache {search_query: (fetched_at, page_data)}
+        # shelve isn't thread-safe and pages are fetched from worker threads
+        self.disk_cache = None
+        self.disk_cache_path = disk_cache_path
+        self._disk_cache_lock = threading.Lock()
+        self._disk_index = {}
+        # Records overwritten or deleted since the file was last rewritten;
+        # dbm never reuses their space, so the file is compacted periodically
+        self._disk_cache_stale = 0
+        if disk_cache_path:
+            try:
+                self._open_disk_cache()
+                logger.info(f"Wikipedia disk cache: {len(self._disk_index)} pages in {disk_cache_path}")
+            except Exception as e:
+                logger.warning(f"Could not open Wikipedia disk cache: {str(e)}")
+                self.disk_cache = None
+        
+        # Page fetches are blocking HTTP calls; run them on a shared pool so
+        # the lookups for one batch of facts overlap
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wikipedia")
+        
+        # Page lookups served from the memory or disk cache vs fetched
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_stats_lock = threading.Lock()
+        
+        # Cap on page fetches in flight across all callers, to stay within
+        # Wikimedia's rate limits; cache hits don't count against it
+        self._request_slots = threading.BoundedSemaphore(max_concurrent_requests)
+        
+        # prefetch calls sharing a pending dict may run on several threads
+        self._prefetch_lock = threading.Lock()
+        
         logger.info("Wikipedia verifier initialized")
     
     def verify_fact(self, fact: Dict) -> Dict:
@@ -21,19 +119,147 @@ class WikipediaVerifier:
         Verify a single fact against Wikipedia
         Returns the fact with verification results added
         """
-        entity = fact['entity']
-        entity_type = fact['entity_type']
+        search_query = self._search_query_for(fact)
+        
+        page = None
+        if self._is_valid_query(search_query):
+            page = self._fetch_page(search_query)
+        
+        return self._verify_with_page(fact, search_query, page)
+    
+    def verify_single(self, entity: str, entity_type: str, sentence: str = "",
+                      prefetched: Optional[Dict[str, Future]] = None) -> Dict:
+        """
+        Verify an entity without building a full fact
+        Returns only the verification fields, and raises if the page can't be
+        fetched so that callers caching the result don't keep the error
+        (sentence is only used to find the subject of value types)
+        The page is taken from prefetched (a prefetch result) when it has it
+        """
+        fact = {"entity": entity, "entity_type": entity_type, "sentence": sentence}
+        search_query = self._search_query_for(fact)
         
-        logger.info(f"Verifying: {entity} ({entity_type})")
+        page = None
+        if self._is_valid_query(search_query):
+            future = prefetched.get(search_query) if prefetched else None
+            page = future.result() if future is not None else self._fetch_page(search_query)
+            if isinstance(page, Exception):
+                raise page
+        
+        return self._verification_result(fact, search_query, page)
+    
+    def prefetch(self, facts: List[Dict], pending: Optional[Dict[str, Future]] = None) -> Dict[str, Future]:
+        """
+        Start fetching the pages for these facts into the page cache
+        Returns the futures by search query, added to pending if given;
+        queries already in pending aren't fetched again
+        Fetch errors are returned as values, not raised
+        """
+        if pending is None:
+            pending = {}
         
+        search_queries = [self._search_query_for(fact) for fact in facts]
+        with self._prefetch_lock:
+            for query in self._unique_queries(search_queries):
+                if query not in pending:
+                    pending[query] = self.executor.submit(self._fetch_page, query)
+        return pending
+    
+    def verify_facts(self, facts: List[Dict]) -> List[Dict]:
+        """
+        Verify multiple facts
+        Distinct pages are fetched concurrently on the verifier's thread pool
+        """
+        search_queries = [self._search_query_for(fact) for fact in facts]
+        unique_queries = self._unique_queries(search_queries)
+        pages = dict(zip(unique_queries, self.executor.map(self._fetch_page, unique_queries)))
+        
+        return self._verify_all(facts, search_queries, pages)
+    
+    async def verify_fact_async(self, fact: Dict) -> Dict:
+        """
+        Verify a single fact without blocking the event loop
+        The Wikipedia lookup runs on the verifier's thread pool
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.verify_fact, fact)
+    
+    async def verify_facts_async(self, facts: List[Dict]) -> List[Dict]:
+        """
+        Verify multiple facts concurrently
+        Each distinct page is fetched once, on the verifier's thread pool, so
+        total latency is roughly that of the slowest lookup rather than the sum
+        """
+        search_queries = [self._search_query_for(fact) for fact in facts]
+        unique_queries = self._unique_queries(search_queries)
+        
+        loop = asyncio.get_running_loop()
+        fetched = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, self._fetch_page, query) for query in unique_queries)
+        )
+        pages = dict(zip(unique_queries, fetched))
+        
+        return self._verify_all(facts, search_queries, pages)
+    
+    def _unique_queries(self, search_queries: List[str]) -> List[str]:
+        """
+        Valid search queries in order, without repeats
+        Several facts often resolve to the same page (an entity and the
+        numbers in its sentence), so each query is only fetched once
+        """
+        return list(dict.fromkeys(q for q in search_queries if self._is_valid_query(q)))
+    
+    def _verify_all(self, facts: List[Dict], search_queries: List[str], pages: Dict) -> List[Dict]:
+        """
+        Verify each fact against the page fetched for its search query
+        Repeats of the same entity (e.g. mentioned in several sentences) are
+        verified once and the result is shared
+        """
+        results = {}
+        verified_facts = []
+        for fact, search_query in zip(facts, search_queries):
+            key = (fact['entity'], fact['entity_type'], search_query)
+            result = results.get(key)
+            if result is None:
+                result = results[key] = self._verification_result(fact, search_query, pages.get(search_query))
+            verified_facts.append({**fact, **result})
+        
+        logger.info(f"Verified {len(verified_facts)} facts")
+        return verified_facts
+    
+    def _fetch_page(self, search_query: str):
+        """Returns the _get_page result, or the exception raised fetching it"""
+        try:
+            return self._get_page(search_query)
+        except Exception as e:
+            return e
+    
+    def _search_query_for(self, fact: Dict) -> str:
+        """Create the Wikipedia search query for a fact"""
         # Create search query based on entity type
-        search_query = self._create_search_query(entity, entity_type, fact['sentence'])
+        return self._create_search_query(fact['entity'], fact['entity_type'], fact['sentence'])
+    
+    def _is_valid_query(self, search_query: str) -> bool:
+        return bool(search_query) and len(search_query.strip()) >= 2
+    
+    def _verify_with_page(self, fact: Dict, search_query: str, page) -> Dict:
+        """
+        Verify a fact against its already fetched page
+        page is the _get_page result, or the exception raised fetching it
+        """
+        return {**fact, **self._verification_result(fact, search_query, page)}
+    
+    def _verification_result(self, fact: Dict, search_query: str, page) -> Dict:
+        """
+        Returns just the verification fields for a fact
+        (depends only on its entity, entity type, search query and page)
+        """
+        logger.info(f"Verifying: {fact['entity']} ({fact['entity_type']})")
         
         # Skip if search query is invalid
-        if not search_query or len(search_query.strip()) < 2:
+        if not self._is_valid_query(search_query):
             logger.info(f"  Skipping invalid search query: {search_query}")
             return {
-                **fact,
                 "verified": False,
                 "confidence": "unknown",
                 "wikipedia_url": None,
@@ -42,64 +268,205 @@ class WikipediaVerifier:
         
         # Search Wikipedia
         try:
-            page = self.wiki.page(search_query)
+            if isinstance(page, Exception):
+                raise page
             
-            if not page.exists():
+            if not page:
                 logger.info(f"  No Wikipedia page found for: {search_query}")
                 return {
-                    **fact,
                     "verified": False,
                     "confidence": "unknown",
                     "wikipedia_url": None,
                     "verification_note": f"No Wikipedia page found for '{search_query}'"
                 }
             
-            # Get page content
-            page_text = page.text.lower()
-            page_summary = page.summary.lower()
-            
             # Verify the fact
-            verification_result = self._verify_against_content(
-                fact, page_text, page_summary
-            )
+            verification_result = self._verify_against_content(fact, page)
             
             return {
-                **fact,
                 **verification_result,
-                "wikipedia_url": page.fullurl,
-                "wikipedia_title": page.title
+                "wikipedia_url": page["url"],
+                "wikipedia_title": page["title"]
             }
             
         except Exception as e:
-            logger.error(f"  Error searching Wikipedia: {str(e)}")
-            return {
-                **fact,
-                "verified": False,
-                "confidence": "unknown",
-                "wikipedia_url": None,
-                "verification_note": f"Error accessing Wikipedia: {str(e)}"
-            }
+            return self.error_result(e)
     
-    def verify_facts(self, facts: List[Dict]) -> List[Dict]:
-        """Verify multiple facts"""
-        verified_facts = []
+    def error_result(self, error: Exception) -> Dict:
+        """Verification fields for a fact whose page couldn't be fetched or checked"""
+        logger.error(f"  Error searching Wikipedia: {str(error)}")
+        return {
+            "verified": False,
+            "confidence": "unknown",
+            "wikipedia_url": None,
+            "verification_note": f"Error accessing Wikipedia: {str(error)}"
+        }
+    
+    def warmup(self, titles: List[str]):
+        """Fetch pages ahead of time so later verifications are served from cache"""
+        for title in titles:
+            try:
+                self._get_page(title)
+            except Exception as e:
+                logger.error(f"  Error warming up '{title}': {str(e)}")
         
-        for fact in facts:
-            verified_fact = self.verify_fact(fact)
-            verified_facts.append(verified_fact)
+        logger.info(f"Warmed up {len(titles)} Wikipedia pages")
+    
+    def _get_page(self, search_query: str) -> Dict:
+        """
+        Fetch a Wikipedia page, using the page caches when possible
+        Returns {text, summary, url, title} with text and summary lowercased
+        and UTF-8 encoded, or an empty dict if no page exists
+        """
+        page_data = self.page_cache.get(search_query)
+        if page_data is None:
+            page_data = self._load_from_disk(search_query)
+            self._count_lookup(hit=page_data is not None)
+            if page_data is None:
+                # exists(), text and summary each trigger API requests
+                with self._request_slots:
+                    page = self.wiki.page(search_query)
+                    if page.exists():
+                        # Kept as UTF-8 bytes: a page with any non-Latin-1
+                        # character is stored as a 2 or 4 bytes-per-character
+                        # str, and its UTF-8 form is mostly 1 byte per character
+                        page_data = {
+                            "text": page.text.lower().encode('utf-8', 'surrogatepass'),
+                            "summary": page.summary.lower().encode('utf-8', 'surrogatepass'),
+                            "url": page.fullurl,
+                            "title": page.title
+                        }
+                    else:
+                        page_data = {}
+                self._save_to_disk(search_query, page_data)
+            self.page_cache[search_query] = page_data
+        else:
+            self._count_lookup(hit=True)
+        return page_data
+    
+    def _count_lookup(self, hit: bool):
+        """Count a page cache hit or miss, logging the hit rate on each miss"""
+        with self._cache_stats_lock:
+            if hit:
+                self.cache_hits += 1
+                return
+            self.cache_misses += 1
+            hits, misses = self.cache_hits, self.cache_misses
         
-        logger.info(f"Verified {len(verified_facts)} facts")
-        return verified_facts
+        logger.info(f"Wikipedia page cache: {hits} hits, {misses} misses ({hits / (hits + misses):.0%} hit rate)")
+    
+    def _open_disk_cache(self):
+        """
+        Open the shelve file, dropping expired entries and anything past the
+        size limit, and compacting the file if any were dropped
+        """
+        self.disk_cache = shelve.open(self.disk_cache_path)
+        index = self.disk_cache.get(DISK_CACHE_INDEX_KEY)
+        if index is None:
+            # No index (empty, or written before the index was kept); start over
+            self.disk_cache.close()
+            self.disk_cache = shelve.open(self.disk_cache_path, 'n')
+            return
+        
+        now = time.time()
+        live = [(query, fetched_at) for query, fetched_at in index.items() if now - fetched_at <= DISK_CACHE_TTL]
+        self._disk_index = dict(live[-DISK_CACHE_MAX_ENTRIES:])
+        if len(self.disk_cache) != len(self._disk_index) + 1:
+            self._compact_disk_cache()
+    
+    def _compact_disk_cache(self):
+        """
+        Rewrite the shelve file with only the indexed entries, giving back
+        the space of evicted, expired and overwritten records
+        Called with the disk cache lock held (or before any threads start)
+        """
+        compact_path = self.disk_cache_path + ".compact"
+        with shelve.open(compact_path, 'n') as compacted:
+            for query in list(self._disk_index):
+                try:
+                    compacted[query] = self.disk_cache[query]
+                except:
+                    del self._disk_index[query]
+            compacted[DISK_CACHE_INDEX_KEY] = self._disk_index
+        
+        self.disk_cache.close()
+        self.disk_cache = None
+        # dbm may store a database as several files (e.g. .dat and .dir);
+        # move each over the file with the same suffix
+        directory = os.path.dirname(compact_path) or "."
+        prefix = os.path.basename(compact_path)
+        for name in os.listdir(directory):
+            if name.startswith(prefix):
+                os.replace(os.path.join(directory, name), self.disk_cache_path + name[len(prefix):])
+        
+        self.disk_cache = shelve.open(self.disk_cache_path)
+        self._disk_cache_stale = 0
+        logger.info(f"Compacted Wikipedia disk cache to {len(self._disk_index)} pages")
+    
+    def _load_from_disk(self, search_query: str) -> Optional[Dict]:
+        """Returns the page stored on disk for this query, or None if missing or expired"""
+        if self.disk_cache is None:
+            return None
+        
+        with self._disk_cache_lock:
+            fetched_at = self._disk_index.pop(search_query, None)
+            if fetched_at is None:
+                return None
+            
+            try:
+                if time.time() - fetched_at > DISK_CACHE_TTL:
+                    del self.disk_cache[search_query]
+                    self._disk_cache_stale += 1
+                    return None
+                
+                _, page_data = self.disk_cache[search_query]
+            except:
+                return None
+            
+            # Mark as most recently used (saved with the index on the next write)
+            self._disk_index[search_query] = fetched_at
+        
+        return page_data
+    
+    def _save_to_disk(self, search_query: str, page_data: Dict):
+        if self.disk_cache is None:
+            return
+        
+        with self._disk_cache_lock:
+            try:
+                fetched_at = time.time()
+                if self._disk_index.pop(search_query, None) is not None:
+                    self._disk_cache_stale += 1
+                self._disk_index[search_query] = fetched_at
+                self.disk_cache[search_query] = (fetched_at, page_data)
+                
+                # Evict the least recently used pages past the size limit
+                while len(self._disk_index) > DISK_CACHE_MAX_ENTRIES:
+                    oldest = next(iter(self._disk_index))
+                    del self._disk_index[oldest]
+                    self.disk_cache.pop(oldest, None)
+                    self._disk_cache_stale += 1
+                
+                # Rewriting the index leaves its old record behind too
+                self.disk_cache[DISK_CACHE_INDEX_KEY] = self._disk_index
+                self._disk_cache_stale += 1
+                
+                if self._disk_cache_stale >= DISK_CACHE_MAX_ENTRIES:
+                    self._compact_disk_cache()
+                else:
+                    self.disk_cache.sync()
+            except Exception as e:
+                logger.warning(f"Could not write Wikipedia disk cache: {str(e)}")
     
     def _create_search_query(self, entity: str, entity_type: str, sentence: str) -> str:
         """Create optimal search query for Wikipedia"""
         
         # For locations, people, organizations - use entity directly
-        if entity_type in ["GPE", "LOC", "PERSON", "ORG"]:
+        if entity_type in NAMED_ENTITY_TYPES:
             return entity
         
         # For dates, numbers, measurements - extract main subject from sentence
-        if entity_type in ["DATE", "CARDINAL", "QUANTITY", "MONEY", "MEASUREMENT", "POPULATION", "WEIGHT", "TEMPERATURE"]:
+        if entity_type in VALUE_TYPES:
             # Extract the main subject (proper noun) from the sentence
             subject = self._extract_subject_from_sentence(sentence)
             
@@ -122,35 +489,38 @@ class WikipediaVerifier:
         - "Paris has 2.2 million people" -> "Paris"
         """
         # Pattern 1: Capitalized word(s) at the start
-        match = re.match(r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', sentence)
-        if match:
-            return match.group(1)
-        
         # Pattern 2: "The [Proper Noun]"
-        match = re.search(r'[Tt]he\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', sentence)
+        match = SUBJECT_PATTERN.search(sentence)
         if match:
-            return match.group(1)
+            return match.group('start') or match.group('the')
         
         # Pattern 3: Look for any capitalized phrase
-        match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', sentence)
+        match = CAPITALIZED_PHRASE_PATTERN.search(sentence)
         if match:
             return match.group(1)
         
         return None
     
-    def _verify_against_content(self, fact: Dict, page_text: str, page_summary: str) -> Dict:
+    def _verify_against_content(self, fact: Dict, page: Dict) -> Dict:
         """
-        Verify fact against Wikipedia content
+        Verify fact against Wikipedia content (a _get_page result)
         Returns verification result with confidence level
         """
+        page_text = page["text"]
+        page_summary = page["summary"]
         entity = fact['entity'].lower()
+        # The page is stored as UTF-8 bytes; UTF-8 is self-synchronizing, so
+        # a bytes substring match is the same as a str one
+        entity_bytes = entity.encode('utf-8', 'surrogatepass')
         entity_type = fact['entity_type']
         
         # For different entity types, use different verification strategies
         
-        if entity_type in ["GPE", "LOC", "PERSON", "ORG"]:
+        if entity_type in NAMED_ENTITY_TYPES:
             # For entities, just check if mentioned
-            if entity in page_text or entity in page_summary:
+            # (the summary is the page's lead section, so it is checked first;
+            # most mentioned entities are found there without scanning the body)
+            if entity_bytes in page_summary or entity_bytes in page_text:
                 return {
                     "verified": True,
                     "confidence": "high",
@@ -163,12 +533,12 @@ class WikipediaVerifier:
                     "verification_note": "Entity not found in Wikipedia page"
                 }
         
-        elif entity_type in ["DATE", "CARDINAL", "QUANTITY", "MEASUREMENT", "POPULATION", "MONEY", "WEIGHT", "TEMPERATURE"]:
+        elif entity_type in VALUE_TYPES:
             # For numbers/dates, check if the specific value appears
-            entity_clean = re.sub(r'[,\s]', '', entity)  # Remove commas and spaces
-            page_text_clean = re.sub(r'[,\s]', '', page_text)
+            entity_clean = entity.translate(COMMAS_WHITESPACE_TABLE)  # Remove commas and spaces
+            page_text_clean = self._page_text_clean(page)
             
-            if entity_clean in page_text_clean:
+            if entity_clean.encode('utf-8', 'surrogatepass') in page_text_clean:
                 return {
                     "verified": True,
                     "confidence": "high",
@@ -176,7 +546,7 @@ class WikipediaVerifier:
                 }
             
             # Check for similar values (e.g., 14 million vs 14.2 million)
-            if self._check_similar_numbers(entity, page_text):
+            if self._check_similar_numbers(entity, self._page_numbers(page)):
                 return {
                     "verified": True,
                     "confidence": "medium",
@@ -196,33 +566,74 @@ class WikipediaVerifier:
             "verification_note": "Could not verify"
         }
     
-    def _check_similar_numbers(self, entity: str, text: str) -> bool:
-        """Check if similar numbers appear (handles minor variations)"""
+    def _page_text_clean(self, page: Dict) -> bytes:
+        """
+        Returns the page text with commas and whitespace removed, UTF-8 encoded
+        Built once per page for a batch of facts, but not kept alongside the
+        page for the hour it stays cached
+        """
+        text_clean = self._clean_text_cache.get(page["url"])
+        if text_clean is None:
+            text = page["text"].decode('utf-8', 'surrogatepass')
+            text_clean = text.translate(COMMAS_WHITESPACE_TABLE).encode('utf-8', 'surrogatepass')
+            self._clean_text_cache[page["url"]] = text_clean
+        return text_clean
+    
+    def _page_numbers(self, page: Dict) -> Sequence[float]:
+        """
+        Returns every number in the page text, sorted
+        Parsed on first use and kept on the page record, so all facts checked
+        against the same page share it (as a packed array of doubles, since
+        long pages hold thousands of numbers and stay cached for an hour)
+        """
+        numbers = page.get("numbers")
+        if numbers is None:
+            parsed = []
+            text = page["text"].decode('utf-8', 'surrogatepass')
+            for text_num in NUMBER_WITH_UNIT_PATTERN.findall(text):
+                try:
+                    parsed.append(float(text_num))
+                except:
+                    continue
+            parsed.sort()
+            numbers = page["numbers"] = array('d', parsed)
+        return numbers
+    
+    def _check_similar_numbers(self, entity: str, text_numbers: Sequence[float]) -> bool:
+        """
+        Check if similar numbers appear (handles minor variations)
+        text_numbers must be sorted
+        """
         
         # Extract number from entity
-        number_match = re.search(r'([\d.]+)', entity)
+        number_match = NUMBER_PATTERN.search(entity)
         if not number_match:
             return False
         
         try:
             value = float(number_match.group(1))
-            
-            # Look for similar values in text (within 10% tolerance)
-            text_numbers = re.findall(r'([\d.]+)\s*(?:million|billion|thousand|meters|feet|km)?', text.lower())
-            
-            for text_num in text_numbers:
-                try:
-                    text_value = float(text_num)
-                    # Check if within 10% tolerance
-                    if abs(text_value - value) / value < 0.1:
-                        return True
-                except:
-                    continue
-            
         except:
-            pass
+            return False
+        
+        if value <= 0:
+            return False
+        
+        # Look for similar values in text (within 10% tolerance)
+        # Only numbers in a slightly wider window around the value can
+        # qualify, so bisect to it and apply the exact check there
+        start = bisect_left(text_numbers, value * 0.89)
+        end = bisect_right(text_numbers, value * 1.11)
+        for text_value in text_numbers[start:end]:
+            # Check if within 10% tolerance
+            if abs(text_value - value) / value < 0.1:
+                return True
         
         return False
 
-# Create singleton instance
-wikipedia_verifier = WikipediaVerifier()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_wikipedia_verifier() -> WikipediaVerifier:
+    """
+    Shared verifier, created on first use
+    Importing this module doesn't open the page cache or start the fetch pool
+    """
+    return WikipediaVerifier()
\ No newline at end of file
@@ -1,9 +1,22 @@
 import re
 import logging
-from typing import List, Dict
+from functools import lru_cache
+from typing import Callable, List, Dict
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=512)
+def entities_pattern(entities: tuple) -> re.Pattern:
+    """
+    Compiled whole-word pattern matching any of the entities, reused across responses
+    Entities should be ordered longest first so longer ones win at the same position
+    """
+    return re.compile(r'\b(?:' + '|'.join(re.escape(entity) for entity in entities) + r')\b')
+
+# Highlight markup for a fact span: color, note, [url,] emoji, entity
+HTML_SPAN_WITH_URL = '<span class="fact-%s" title="%s" data-url="%s">%s %s</span>'
+HTML_SPAN_NO_URL = '<span class="fact-%s" title="%s">%s %s</span>'
+
 class ResponseFormatter:
     """Format responses with inline fact verification markers"""
     
@@ -18,9 +31,13 @@ class ResponseFormatter:
         # Create a mapping of text spans to their verification status
         fact_spans = self._create_fact_spans(verified_facts, contradictions)
         
+        # Sort spans by length once for both formats
+        # (longest first to avoid nested replacements)
+        sorted_spans = sorted(fact_spans, key=lambda x: len(x['text']), reverse=True)
+        
         # Generate both plain and HTML formatted versions
-        html_formatted = self._create_html_format(original_text, fact_spans)
-        markdown_formatted = self._create_markdown_format(original_text, fact_spans)
+        html_formatted = self._create_html_format(original_text, sorted_spans)
+        markdown_formatted = self._create_markdown_format(original_text, sorted_spans)
         
         # Generate fact summary
         fact_summary = self._create_fact_summary(verified_facts, contradictions)
@@ -41,16 +58,15 @@ class ResponseFormatter:
         spans = []
         
         # Get contradicted entities
-        contradicted_entities = set()
-        for cont in contradictions:
-            if 'current_value' in cont:
-                contradicted_entities.add(cont['current_value'].lower())
+        contradicted_entities = frozenset(
+            cont['current_value'].lower() for cont in contradictions if 'current_value' in cont
+        )
         
         for fact in verified_facts:
             entity = fact['entity']
             
             # Determine status
-            if entity.lower() in contradicted_entities:
+            if contradicted_entities and entity.lower() in contradicted_entities:
                 status = "contradicted"
                 color = "red"
                 emoji = "❌"
@@ -79,52 +95,55 @@ class ResponseFormatter:
         
         return spans
     
-    def _create_html_format(self, text: str, fact_spans: List[Dict]) -> str:
-        """Create HTML formatted version with colored highlights"""
-        formatted = text
-        
-        # Sort spans by length (longest first to avoid nested replacements)
-        sorted_spans = sorted(fact_spans, key=lambda x: len(x['text']), reverse=True)
-        
-        # Keep track of what we've already replaced
-        replaced_positions = set()
-        
-        for span in sorted_spans:
-            entity = span['text']
-            color = span['color']
-            emoji = span['emoji']
-            url = span['wikipedia_url']
-            note = span['note']
-            
+    def _create_html_format(self, text: str, sorted_spans: List[Dict]) -> str:
+        """
+        Create HTML formatted version with colored highlights
+        Expects spans sorted longest first
+        """
+        def html_span(span: Dict, entity: str) -> str:
             # Create HTML span with tooltip
+            url = span['wikipedia_url']
             if url:
-                html_span = f'<span class="fact-{color}" title="{note}" data-url="{url}">{emoji} {entity}</span>'
-            else:
-                html_span = f'<span class="fact-{color}" title="{note}">{emoji} {entity}</span>'
-            
-            # Replace first occurrence only
-            # Use word boundaries to avoid partial matches
-            pattern = r'\b' + re.escape(entity) + r'\b'
-            formatted = re.sub(pattern, html_span, formatted, count=1)
+                return HTML_SPAN_WITH_URL % (span['color'], span['note'], url, span['emoji'], entity)
+            return HTML_SPAN_NO_URL % (span['color'], span['note'], span['emoji'], entity)
         
-        return formatted
+        return self._replace_spans(text, sorted_spans, html_span)
     
-    def _create_markdown_format(self, text: str, fact_spans: List[Dict]) -> str:
-        """Create Markdown formatted version"""
-        formatted = text
+    def _create_markdown_format(self, text: str, sorted_spans: List[Dict]) -> str:
+        """
+        Create Markdown formatted version
+        Expects spans sorted longest first
+        """
+        # Replace with emoji marker
+        return self._replace_spans(text, sorted_spans, lambda span, entity: f"{span['emoji']} {entity}")
+    
+    def _replace_spans(self, text: str, sorted_spans: List[Dict], render: Callable[[Dict, str], str]) -> str:
+        """
+        Mark the first occurrence of each span's entity in a single pass over the text
+        Replacements are never re-scanned, so markup can't get nested
+        """
+        # First span wins for entities that appear more than once
+        span_by_entity = {}
+        for span in sorted_spans:
+            if span['text']:
+                span_by_entity.setdefault(span['text'], span)
         
-        # Sort spans by length
-        sorted_spans = sorted(fact_spans, key=lambda x: len(x['text']), reverse=True)
+        if not span_by_entity:
+            return text
         
-        for span in sorted_spans:
-            entity = span['text']
-            emoji = span['emoji']
-            
-            # Replace with emoji marker
-            pattern = r'\b' + re.escape(entity) + r'\b'
-            formatted = re.sub(pattern, f'{emoji} {entity}', formatted, count=1)
+        # Use word boundaries to avoid partial matches
+        pattern = entities_pattern(tuple(span_by_entity))
+        seen = set()
+        
+        def replace(match):
+            entity = match.group(0)
+            # Replace first occurrence only
+            if entity in seen:
+                return entity
+            seen.add(entity)
+            return render(span_by_entity[entity], entity)
         
-        return formatted
+        return pattern.sub(replace, text)
     
     def _create_fact_summary(self, verified_facts: List[Dict], contradictions: List[Dict]) -> List[Dict]:
         """Create a summary of all facts with their status"""
@@ -142,5 +161,7 @@ class ResponseFormatter:
         
         return summary
 
-# Create singleton instance
-response_formatter = ResponseFormatter()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_response_formatter() -> ResponseFormatter:
+    """Shared formatter, created on first use"""
+    return ResponseFormatter()
\ No newline at end of file
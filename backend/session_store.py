@@ -0,0 +1,96 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+class LRUStore:
+    """
+    Dict-like store bounded to maxsize entries
+    Evicts the least recently used entry when full, and optionally
+    expires entries that have not been used for ttl seconds
+    """
+    
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # {key: (expires_at, value)}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value for key (marking it recently used), or default"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            
+            expires_at, value = item
+            if expires_at is not None:
+                now = time.monotonic()
+                if expires_at <= now:
+                    del self._data[key]
+                    return default
+                self._data[key] = (now + self.ttl, value)
+            
+            self._data.move_to_end(key)
+            return value
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key and return its value, or default"""
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[1]
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __setitem__(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def __delitem__(self, key: Hashable):
+        with self._lock:
+            del self._data[key]
+    
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether key is present and unexpired; doesn't mark it recently used"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return False
+            
+            expires_at = item[0]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return False
+            return True
+    
+    def __len__(self) -> int:
+        """Number of unexpired entries"""
+        with self._lock:
+            self._purge_expired()
+            return len(self._data)
+    
+    def _purge_expired(self):
+        # Every use moves an entry to the end with a fresh expiry, so entries
+        # are ordered by expiry and the expired ones are all at the front
+        if self.ttl is None:
+            return
+        now = time.monotonic()
+        while self._data:
+            key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
@@ -19,4 +19,22 @@ for i, text in enumerate(test_cases, 1):
         print(f"\nFact {j}:")
         print(f"  Entity: {fact['entity']}")
         print(f"  Type: {fact['entity_type']}")
-        print(f"  Sentence: {fact['sentence']}")
\ No newline at end of file
+        print(f"  Sentence: {fact['sentence']}")
+
+# Batch extraction should match one-by-one extraction
+print(f"\n{'='*60}")
+print("Batch extraction")
+print(f"{'='*60}")
+
+batch_results = fact_extractor.extract_facts_batch(test_cases)
+mismatches = 0
+for text, facts in zip(test_cases, batch_results):
+    single = fact_extractor.extract_facts(text)
+    if facts == single:
+        status = "match"
+    else:
+        status = "MISMATCH"
+        mismatches += 1
+    print(f"{status}: {len(facts)} facts (single: {len(single)}) - {text[:40]}...")
+
+assert mismatches == 0, f"{mismatches} batch result(s) differ from extract_facts"
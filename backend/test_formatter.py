@@ -1,4 +1,4 @@
-from response_formatter import response_formatter
+from response_formatter import get_response_formatter
 
 # Test response
 test_text = "Tokyo is the capital of Japan with a population of 14 million people. The city was founded in 1457."
@@ -45,7 +45,7 @@ test_contradictions = []
 print("Testing Response Formatter\n")
 print("="*70)
 
-result = response_formatter.format_response(test_text, test_facts, test_contradictions)
+result = get_response_formatter().format_response(test_text, test_facts, test_contradictions)
 
 print("\n📄 ORIGINAL:")
 print(result['original'])
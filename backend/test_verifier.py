@@ -1,4 +1,4 @@
-from refdatabase import wikipedia_verifier
+from refdatabase import get_wikipedia_verifier
 
 # Test facts
 test_facts = [
@@ -37,7 +37,7 @@ for fact in test_facts:
     print(f"  Type: {fact['entity_type']}")
     print(f"  Sentence: {fact['sentence']}")
     
-    verified = wikipedia_verifier.verify_fact(fact)
+    verified = get_wikipedia_verifier().verify_fact(fact)
     
     print(f"\nVerification Result:")
     print(f"  ✓ Verified: {verified['verified']}")
@@ -1,38 +1,186 @@
 import streamlit as st
+import logging
 import sys
 import os
 
+# Show the backend's logs (e.g. the Wikipedia cache hit rate) in the
+# server output, as the FastAPI app does
+logging.basicConfig(level=logging.INFO)
+
 # Add backend to path
 backend_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
-sys.path.insert(0, backend_path)
+# (the script reruns on every interaction; don't stack duplicate entries)
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
 
-from fact_extract import fact_extractor
-from refdatabase import wikipedia_verifier
-from confidence_scorer import confidence_scorer
-from contradiction_detector import contradiction_detector
-from response_formatter import response_formatter
-import google.generativeai as genai
-from dotenv import load_dotenv
+# Backend modules, spaCy and the Gemini SDK are imported inside the cached
+# loaders below, so the page can render before they are loaded
+from concurrent.futures import ThreadPoolExecutor, wait
+import re
 import uuid
 
-# Load environment variables
+# Load environment variables (once per server process, not on every rerun)
 env_path = os.path.join(backend_path, '.env')
-load_dotenv(env_path)
 
-# Configure Gemini
+@st.cache_resource(show_spinner=False)
+def load_env():
+    from dotenv import load_dotenv
+    load_dotenv(env_path)
 
-genai.configure(api_key = st.secrets["GEMINI_API_KEY"])
-model = genai.GenerativeModel('gemini-flash-latest')
+load_env()
 
-# Page config
-st.set_page_config(
-    page_title="LLM Hallucination Prevention",
-    page_icon="🛡️",
-    layout="wide"
-)
+# Configure Gemini once per server process, not on every rerun
+@st.cache_resource(show_spinner=False)
+def get_model():
+    import google.generativeai as genai
+    genai.configure(api_key = st.secrets["GEMINI_API_KEY"])
+    return genai.GenerativeModel('gemini-flash-latest')
 
-# Custom CSS
-st.markdown("""
+# Gemini's replies keyed by (query, history as (role, text) pairs); repeating
+# a question in the same conversation reuses the answer. Replies are
+# streamed, so they are stored here rather than through st.cache_data
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    from session_store import LRUStore
+    return LRUStore(maxsize=1_000, ttl=3600)
+
+# Verification fields by verification_key; Wikipedia facts are stable, so
+# results are kept for a day. Unlike st.cache_data, it can be checked
+# without running the verification, so only misses have pages fetched
+@st.cache_resource(show_spinner=False)
+def get_verification_cache():
+    from session_store import LRUStore
+    return LRUStore(maxsize=10_000, ttl=86400)
+
+# Fact extraction for streamed sentences runs here, off the thread that
+# consumes and renders the stream
+@st.cache_resource(show_spinner=False)
+def get_extraction_pool():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="extract")
+
+# End of a complete sentence in streamed text
+SENTENCE_END = re.compile(r'[.!?]\s')
+
+def get_chat(history_key: tuple):
+    """
+    This session's Gemini chat, positioned after history_key
+    The chat from the previous turn is reused while it is in sync with the
+    conversation; it is only rebuilt (from the dict form) when it isn't
+    """
+    chat = st.session_state.get('chat')
+    if chat is None or st.session_state.get('chat_history') is not history_key:
+        history = [{"role": role, "parts": [text]} for role, text in history_key]
+        chat = st.session_state.chat = get_model().start_chat(history=history)
+    
+    # Out of sync until this turn's reply is recorded
+    st.session_state.chat_history = None
+    return chat
+
+def prefetch_sentences(text: str, verification_cache, prefetched: dict):
+    """
+    Runs on the extraction pool: start the page fetches (into prefetched)
+    for the facts in text that are missing from verification_cache
+    """
+    facts = fact_extractor.extract_facts(text)
+    misses = [fact for fact in facts if verification_key(fact) not in verification_cache]
+    wikipedia_verifier.prefetch(misses, prefetched)
+
+def stream_response(query: str, history_key: tuple, placeholder) -> tuple:
+    """
+    Stream Gemini's reply into placeholder
+    Each completed sentence is run through the extractor on the extraction
+    pool while the rest is still generating, so the Wikipedia pages its
+    facts need start loading right away
+    Returns (response text, page fetch futures by search query)
+    """
+    chat = get_chat(history_key)
+    pool = get_extraction_pool()
+    verification_cache = get_verification_cache()
+    
+    response_text = ""
+    done = 0  # end of the last sentence handed to the extractor
+    jobs = []
+    prefetched = {}
+    for chunk in chat.send_message(query, stream=True):
+        response_text += chunk.text
+        placeholder.markdown(response_text)
+        
+        sentence_ends = [match.end() for match in SENTENCE_END.finditer(response_text, done)]
+        if sentence_ends:
+            sentences = response_text[done:sentence_ends[-1]]
+            done = sentence_ends[-1]
+            jobs.append(pool.submit(prefetch_sentences, sentences, verification_cache, prefetched))
+    
+    # These only start page loads; the response's facts are extracted from
+    # the full text afterwards, since where the stream splits sentences
+    # varies between runs and the extractor loses context at each split
+    wait(jobs)
+    return response_text, prefetched
+
+def verification_key(fact: dict) -> tuple:
+    """Key of a fact's result in the verification cache"""
+    from refdatabase import VALUE_TYPES
+    
+    # The sentence only matters for value types (it supplies the subject
+    # to look up), so named entities share one cache entry
+    sentence = fact['sentence'] if fact['entity_type'] in VALUE_TYPES else ""
+    return (fact['entity'], fact['entity_type'], sentence)
+
+def uncached_facts(facts: list) -> list:
+    """The facts with no result in the verification cache"""
+    verification_cache = get_verification_cache()
+    return [fact for fact in facts if verification_key(fact) not in verification_cache]
+
+def verify_cached(facts: list, prefetched: dict = None) -> list:
+    """
+    Verify facts through the verification cache, fetching the pages of
+    the ones missing from it concurrently first
+    prefetched holds page fetches already started, by search query (as
+    returned by the verifier's prefetch); those pages aren't fetched again
+    """
+    verification_cache = get_verification_cache()
+    prefetched = wikipedia_verifier.prefetch(uncached_facts(facts), prefetched)
+    
+    verified_facts = []
+    for fact in facts:
+        key = verification_key(fact)
+        result = verification_cache.get(key)
+        if result is None:
+            try:
+                # Fetch errors raise and are therefore not cached
+                result = verification_cache[key] = wikipedia_verifier.verify_single(*key, prefetched=prefetched)
+            except Exception as e:
+                verified_facts.append({**fact, **wikipedia_verifier.error_result(e)})
+                continue
+        verified_facts.append({**fact, **result})
+    return verified_facts
+
+# Backend components (spaCy model, Wikipedia session and caches, session
+# facts) are shared across reruns and sessions
+@st.cache_resource(show_spinner="Loading language model...")
+def load_backend():
+    from fact_extract import fact_extractor
+    from refdatabase import get_wikipedia_verifier
+    from confidence_scorer import confidence_scorer
+    from contradiction_detector import contradiction_detector
+    from response_formatter import get_response_formatter
+    
+    # fact_extract loads spaCy on first use; do it now, while the page
+    # loads, rather than inside the first Verify click
+    fact_extractor.warm_up()
+    
+    return (
+        fact_extractor,
+        get_wikipedia_verifier(),
+        confidence_scorer,
+        contradiction_detector,
+        get_response_formatter()
+    )
+
+# Static page markup. Streamlit drops any element a rerun doesn't emit
+# again, so these are still written on every rerun (a once-per-session
+# guard would leave the page unstyled after the first click)
+APP_CSS = """
 <style>
     .main {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -69,13 +217,45 @@ st.markdown("""
         margin: 5px 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# (color class, emoji) for a fact card by (verified, confidence); any other
+# fact is red if it failed verification and orange if it couldn't be checked
+FACT_CARD_STYLES = {
+    (True, 'high'): ('fact-green', '✅'),
+    (True, 'medium'): ('fact-yellow', '⚠️'),
+}
+UNVERIFIED_CARD_STYLE = ('fact-red', '❌')
+UNKNOWN_CARD_STYLE = ('fact-orange', '❓')
+
+# Longer verification notes are cut short on the fact cards
+MAX_NOTE_CHARS = 160
+
+FOOTER_HTML = """
+<div style='text-align: center; color: white; padding: 20px;'>
+    <small>Built by Soumyashis Sarkar | Powered by Gemini & Wikipedia (as database of reference)</small>
+</div>
+"""
+
+# Page config
+st.set_page_config(
+    page_title="LLM Hallucination Prevention",
+    page_icon="🛡️",
+    layout="wide"
+)
+
+# Custom CSS
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # Initialize session state
 if 'session_id' not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
 if 'conversation_history' not in st.session_state:
-    st.session_state.conversation_history = []
+    # (role, text) pairs; a tuple, so it doubles as the response cache key
+    # Only the last context_turns turns are kept and sent to Gemini
+    st.session_state.conversation_history = ()
+if 'message_count' not in st.session_state:
+    st.session_state.message_count = 0
 
 # Header
 st.title("🛡️ LLM Hallucination Prevention System")
@@ -96,165 +276,190 @@ with st.sidebar:
     
     st.header("📊 Session Info")
     st.write(f"Session ID: `{st.session_state.session_id[:8]}...`")
-    st.write(f"Messages: {len(st.session_state.conversation_history) // 2}")
+    st.write(f"Messages: {st.session_state.message_count}")
+    
+    st.slider(
+        "Context turns",
+        min_value=1,
+        max_value=50,
+        value=10,
+        key="context_turns",
+        help="How many previous question/answer turns are sent to Gemini"
+    )
     
     if st.button("🔄 Reset Session", use_container_width=True):
         st.session_state.session_id = str(uuid.uuid4())
-        st.session_state.conversation_history = []
+        st.session_state.conversation_history = ()
+        st.session_state.message_count = 0
+        st.session_state.chat = None
         st.rerun()
 
-# Main input
-query = st.text_input(
-    "Ask a question:",
-    placeholder="e.g., What is the population of Tokyo?",
-    key="query_input"
-)
-
-col1, col2, col3 = st.columns([1, 1, 4])
-with col1:
-    verify_button = st.button("✨ Verify", type="primary", use_container_width=True)
-
-# Process query
-if verify_button and query:
-    with st.spinner("🔍 Analyzing response and verifying facts..."):
-        try:
-            # Add user message to history
-            st.session_state.conversation_history.append({
-                "role": "user",
-                "parts": [query]
-            })
-            
-            # Create chat with history
-            chat = model.start_chat(
-                history=st.session_state.conversation_history[:-1]
-            )
-            
-            # Get response
-            response = chat.send_message(query)
-            response_text = response.text
-            
-            # Add assistant response to history
-            st.session_state.conversation_history.append({
-                "role": "model",
-                "parts": [response_text]
-            })
-            
-            # Extract facts
-            extracted_facts = fact_extractor.extract_facts(response_text)
-            
-            # Verify facts
-            verified_facts = wikipedia_verifier.verify_facts(extracted_facts)
-            
-            # Check contradictions
-            contradictions = contradiction_detector.detect_contradictions(
-                st.session_state.session_id, 
-                verified_facts
-            )
-            contradiction_detector.add_facts(st.session_state.session_id, verified_facts)
+# The input, verification and results
+def verify_section():
+    # Main input
+    query = st.text_input(
+        "Ask a question:",
+        placeholder="e.g., What is the population of Tokyo?",
+        key="query_input"
+    )
+    
+    col1, col2, col3 = st.columns([1, 1, 4])
+    with col1:
+        verify_button = st.button("✨ Verify", type="primary", use_container_width=True)
+    
+    # Process query
+    if verify_button and query:
+        with st.spinner("🔍 Analyzing response and verifying facts..."):
+            try:
+                # Get response and its analysis (cached per query + history)
+                history_key = st.session_state.conversation_history
+                response_cache = get_response_cache()
+                cache_key = (query, history_key)
+                cached = response_cache.get(cache_key)
+                response_from_cache = cached is not None
+                if response_from_cache:
+                    response_text, verified_facts, base_confidence_report = cached
+                else:
+                    stream_placeholder = st.empty()
+                    response_text, prefetched = stream_response(query, history_key, stream_placeholder)
+                    stream_placeholder.empty()
+                    
+                    # Extract facts
+                    extracted_facts = fact_extractor.extract_facts(response_text)
+                    
+                    # Verify facts (using the pages requested while streaming,
+                    # so they aren't requested twice)
+                    verified_facts = verify_cached(extracted_facts, prefetched)
+                    
+                    # Calculate confidence
+                    base_confidence_report = confidence_scorer.score_response(verified_facts)
+                    
+                    # Contradictions depend on the session, so only this much is cached
+                    response_cache[cache_key] = (response_text, verified_facts, base_confidence_report)
+                
+                # Add user message and assistant response to history, keeping
+                # only the most recent turns as context
+                history = history_key + (("user", query), ("model", response_text))
+                max_messages = 2 * st.session_state.context_turns
+                st.session_state.conversation_history = history[-max_messages:]
+                st.session_state.message_count += 1
+                if not response_from_cache and len(history) <= max_messages:
+                    # The chat has seen exactly this history now (once turns
+                    # are dropped it is rebuilt from the trimmed window)
+                    st.session_state.chat_history = st.session_state.conversation_history
+                
+                # Check contradictions, then remember these facts
+                contradictions = contradiction_detector.detect_and_add(
+                    st.session_state.session_id, 
+                    verified_facts
+                )
             
-            # Calculate confidence
-            confidence_report = confidence_scorer.score_response(verified_facts)
+                # Adjust confidence if contradictions (on a copy; the base report is cached)
+                confidence_report = dict(base_confidence_report)
+                if contradictions:
+                    confidence_report['overall_confidence'] = 'low'
+                    confidence_report['color'] = 'red'
+                    confidence_report['emoji'] = '🔴'
+                    confidence_report['summary'] = f"⚠️ {len(contradictions)} contradiction(s) detected"
             
-            # Adjust confidence if contradictions
-            if contradictions:
-                confidence_report['overall_confidence'] = 'low'
-                confidence_report['color'] = 'red'
-                confidence_report['emoji'] = '🔴'
-                confidence_report['summary'] = f"⚠️ {len(contradictions)} contradiction(s) detected"
+                # Format response
+                formatted_response = response_formatter.format_response(
+                    response_text,
+                    verified_facts,
+                    contradictions
+                )
             
-            # Format response
-            formatted_response = response_formatter.format_response(
-                response_text,
-                verified_facts,
-                contradictions
-            )
+                # Display results
+                st.divider()
             
-            # Display results
-            st.divider()
+                if response_from_cache:
+                    st.caption("♻️ Response served from cache")
             
-            # Contradictions warning
-            if contradictions:
-                st.error("⚠️ **Contradictions Detected!**")
-                for cont in contradictions:
-                    with st.expander(f"Contradiction: {cont['message']}", expanded=True):
-                        st.write(f"**Previous:** {cont['previous_value']}")
-                        st.write(f"**Current:** {cont['current_value']}")
-                        st.write(f"**Difference:** {cont['difference']}")
+                # Contradictions warning
+                if contradictions:
+                    st.error("⚠️ **Contradictions Detected!**")
+                    for cont in contradictions:
+                        with st.expander(f"Contradiction: {cont['message']}", expanded=True):
+                            st.write(f"**Previous:** {cont['previous_value']}")
+                            st.write(f"**Current:** {cont['current_value']}")
+                            st.write(f"**Difference:** {cont['difference']}")
             
-            # Confidence banner
-            conf_emoji = confidence_report['emoji']
-            conf_level = confidence_report['overall_confidence'].upper()
-            conf_summary = confidence_report['summary']
+                # Confidence banner
+                conf_emoji = confidence_report['emoji']
+                conf_level = confidence_report['overall_confidence'].upper()
+                conf_summary = confidence_report['summary']
             
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Confidence", f"{conf_emoji} {conf_level}")
-            with col2:
-                st.metric("Total Facts", confidence_report['stats']['total_facts'])
-            with col3:
-                st.metric("Verified", confidence_report['stats']['verified'])
-            with col4:
-                st.metric("Score", f"{confidence_report['confidence_score']:.2f}")
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Confidence", f"{conf_emoji} {conf_level}")
+                with col2:
+                    st.metric("Total Facts", confidence_report['stats']['total_facts'])
+                with col3:
+                    st.metric("Verified", confidence_report['stats']['verified'])
+                with col4:
+                    st.metric("Score", f"{confidence_report['confidence_score']:.2f}")
             
-            st.info(conf_summary)
+                st.info(conf_summary)
             
-            # Response comparison
-            st.divider()
-            st.subheader("📄 Response Comparison")
+                # Response comparison
+                st.divider()
+                st.subheader("📄 Response Comparison")
             
-            col1, col2 = st.columns(2)
+                col1, col2 = st.columns(2)
             
-            with col1:
-                st.markdown("**Original Response**")
-                st.write(response_text)
+                with col1:
+                    st.markdown("**Original Response**")
+                    st.write(response_text)
             
-            with col2:
-                st.markdown("**Verified Response (with highlights)**")
-                st.markdown(formatted_response['markdown'])
+                with col2:
+                    st.markdown("**Verified Response (with highlights)**")
+                    st.markdown(formatted_response['markdown'])
             
-            # Facts summary
-            st.divider()
-            st.subheader("📊 Fact Verification Details")
+                # Facts summary
+                st.divider()
+                st.subheader("📊 Fact Verification Details")
             
-            if verified_facts:
-                for i, fact in enumerate(verified_facts, 1):
-                    # Determine color class
-                    if fact.get('verified') and fact.get('confidence') == 'high':
-                        color_class = 'fact-green'
-                        emoji = '✅'
-                    elif fact.get('verified') and fact.get('confidence') == 'medium':
-                        color_class = 'fact-yellow'
-                        emoji = '⚠️'
-                    elif fact.get('verified') == False:
-                        color_class = 'fact-red'
-                        emoji = '❌'
-                    else:
-                        color_class = 'fact-orange'
-                        emoji = '❓'
+                if verified_facts:
+                    # Determine color class and emoji for every fact up front
+                    fact_styles = [
+                        FACT_CARD_STYLES.get((fact.get('verified'), fact.get('confidence')))
+                        or (UNVERIFIED_CARD_STYLE if fact.get('verified') == False else UNKNOWN_CARD_STYLE)
+                        for fact in verified_facts
+                    ]
                     
-                    with st.container():
-                        st.markdown(f"""
+                    # All fact cards go out in one markdown element, carrying
+                    # only what they display
+                    fact_cards = []
+                    for fact, (color_class, emoji) in zip(verified_facts, fact_styles):
+                        note = fact.get('verification_note', 'No note')
+                        if len(note) > MAX_NOTE_CHARS:
+                            note = note[:MAX_NOTE_CHARS - 1] + '…'
+                        
+                        fact_cards.append(f"""
                         <div class="{color_class}">
                             <strong>{emoji} {fact['entity']}</strong><br>
                             <small>Type: {fact['entity_type']} | Confidence: {fact.get('confidence', 'unknown')}</small><br>
-                            <small>{fact.get('verification_note', 'No note')}</small>
+                            <small>{note}</small>
                             {f"<br><a href='{fact.get('wikipedia_url')}' target='_blank'>📖 View on Wikipedia →</a>" if fact.get('wikipedia_url') else ''}
                         </div>
-                        """, unsafe_allow_html=True)
-            else:
-                st.write("No verifiable facts found in this response.")
+                        """)
+                    
+                    st.markdown("\n".join(fact_cards), unsafe_allow_html=True)
+                else:
+                    st.write("No verifiable facts found in this response.")
                 
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
-            st.exception(e)
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
+                st.exception(e)
+    
+    elif verify_button and not query:
+        st.warning("Please enter a question!")
 
-elif verify_button and not query:
-    st.warning("Please enter a question!")
+# Loaded after the header and sidebar are on screen
+fact_extractor, wikipedia_verifier, confidence_scorer, contradiction_detector, response_formatter = load_backend()
+
+verify_section()
 
 # Footer
 st.divider()
-st.markdown("""
-<div style='text-align: center; color: white; padding: 20px;'>
-    <small>Built by Soumyashis Sarkar | Powered by Gemini & Wikipedia (as database of reference)</small>
-</div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
\ No newline at end of file
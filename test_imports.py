@@ -6,13 +6,15 @@ print("Current directory:", os.getcwd())
 print()
 
 # Print __file__ location
-print("Script location:", os.path.abspath(__file__))
+script_path = os.path.abspath(__file__)
+print("Script location:", script_path)
 print()
 
 # Calculate backend path
-backend_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+backend_path = os.path.join(os.path.dirname(script_path), 'backend')
+backend_exists = os.path.isdir(backend_path)
 print("Backend path:", backend_path)
-print("Backend exists?", os.path.exists(backend_path))
+print("Backend exists?", backend_exists)
 print()
 
 # Check if Python files exist
@@ -24,9 +26,12 @@ files_to_check = [
     'response_formatter.py'
 ]
 
+# One directory read instead of a stat per file
+backend_files = {entry.name for entry in os.scandir(backend_path)} if backend_exists else set()
+
 for file in files_to_check:
     full_path = os.path.join(backend_path, file)
-    exists = os.path.exists(full_path)
+    exists = file in backend_files
     print(f"{file}: {'✓ EXISTS' if exists else '✗ MISSING'} ({full_path})")
 
 print()